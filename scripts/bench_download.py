@@ -0,0 +1,271 @@
+"""
+对比 Scrapy 默认的 HTTP/1.1 下载处理器、SteamDownloadHandler（HTTP/1.1）和启用 HTTP/2 的 SteamDownloadHandler 的下载性能。
+在本地启动一个支持 TLS、HTTP/2（ALPN）和 gzip 的模拟服务器，分别用各配置抓取同一批页面，
+输出耗时、服务器端统计的 TLS 连接数，以及 HostTransferStats 记录的传输字节数。
+--rtt-ms 会把客户端发来的每段数据（包括 TLS 握手）延迟一个往返时间，用来模拟真实网络延迟，
+这样新建连接的握手开销才能体现在耗时中。
+
+需要安装 h2 和 priority（Twisted 的 HTTP/2 服务端依赖）。
+
+运行示例:
+    $ python bench_download.py --pages 500 --concurrency 16 --rtt-ms 100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+PROFILES = {
+    'default': {
+        'DOWNLOAD_HANDLERS': {
+            'http': 'scrapy.core.downloader.handlers.http11.HTTP11DownloadHandler',
+            'https': 'scrapy.core.downloader.handlers.http11.HTTP11DownloadHandler',
+        },
+    },
+    'instrumented': {
+        'STEAM_HTTP2_ENABLED': False,
+    },
+    'http2': {
+        'STEAM_HTTP2_ENABLED': True,
+        'STEAM_HTTP2_HOSTS': ['127.0.0.1'],
+    },
+}
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--pages',
+        help='每种配置抓取的页面数。',
+        type=int,
+        default=300
+    )
+    parser.add_argument(
+        '--concurrency',
+        help='并发请求数（同时用作每个主机的并发数和连接池大小）。',
+        type=int,
+        default=16
+    )
+    parser.add_argument(
+        '--page-kb',
+        help='每个页面的大小（KB）。',
+        type=int,
+        default=200
+    )
+    parser.add_argument(
+        '--rtt-ms',
+        help='模拟的网络往返时间（毫秒）。',
+        type=int,
+        default=0
+    )
+    parser.add_argument('--port', type=int, default=8443)
+    # 内部使用：在子进程中运行服务器或爬虫
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--crawl', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--cert-dir', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def make_certificate(cert_dir):
+    """生成本地服务器使用的自签名证书"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    from ipaddress import ip_address
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, '127.0.0.1')])
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ip_address('127.0.0.1'))]),
+                           critical=False)
+            .sign(key, hashes.SHA256()))
+
+    with open(os.path.join(cert_dir, 'key.pem'), 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    with open(os.path.join(cert_dir, 'cert.pem'), 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+
+
+def serve(args):
+    """模拟 Steam 的 TLS 服务器，/stats 返回并重置连接计数"""
+    from collections import deque
+
+    from OpenSSL import crypto
+    from twisted.internet import reactor, ssl
+    from twisted.protocols import policies
+    from twisted.protocols.tls import TLSMemoryBIOFactory
+    from twisted.web import resource, server
+
+    # 类似商店页面：少量可压缩的 HTML 加上大段脚本
+    page = (b'<html><body><div class="apphub_AppName">Bench</div>'
+            + b'<script>var data = "' + os.urandom(args.page_kb * 256).hex().encode()
+            + b'";</script>' + b'<div class="game_area_description">lorem ipsum</div>' * (args.page_kb * 10)
+            + b'</body></html>')
+
+    class Page(resource.Resource):
+        isLeaf = True
+
+        def render_GET(self, request):
+            if request.path == b'/stats':
+                stats = dict(site.stats)
+                stats['connections'] -= 1  # 不计 /stats 请求自身的连接
+                site.stats.update(connections=0, requests=0)
+                return json.dumps(stats).encode()
+            site.stats['requests'] += 1
+            request.setHeader(b'content-type', b'text/html; charset=utf-8')
+            return page
+
+    class CountingSite(server.Site):
+        stats = {'connections': 0, 'requests': 0}
+
+        def buildProtocol(self, addr):
+            self.stats['connections'] += 1
+            return super().buildProtocol(addr)
+
+    root = resource.EncodingResourceWrapper(Page(), [server.GzipEncoderFactory()])
+    site = CountingSite(root)
+
+    with open(os.path.join(args.cert_dir, 'key.pem')) as f:
+        key = f.read()
+    with open(os.path.join(args.cert_dir, 'cert.pem')) as f:
+        cert = f.read()
+    options = ssl.CertificateOptions(
+        privateKey=crypto.load_privatekey(crypto.FILETYPE_PEM, key),
+        certificate=crypto.load_certificate(crypto.FILETYPE_PEM, cert),
+        acceptableProtocols=[b'h2', b'http/1.1'])
+
+    class DelayedProtocol(policies.ProtocolWrapper):
+        """在 TLS 之外按到达顺序延迟投递客户端数据，每次往返都要多等一个 RTT"""
+        def connectionMade(self):
+            self.pending = deque()
+            super().connectionMade()
+
+        def dataReceived(self, data):
+            self.pending.append(data)
+            reactor.callLater(args.rtt_ms / 1000, self.deliver)
+
+        def deliver(self):
+            data = self.pending.popleft()
+            if self.wrappedProtocol is not None:  # 连接已断开时丢弃
+                super().dataReceived(data)
+
+    tls = TLSMemoryBIOFactory(options, False, site)
+    factory = policies.WrappingFactory(tls)
+    factory.protocol = DelayedProtocol
+    reactor.listenTCP(args.port, factory if args.rtt_ms else tls, interface='127.0.0.1')
+    print('ready', flush=True)
+    reactor.run()
+
+
+def crawl(args):
+    """用指定配置抓取一批页面，以 JSON 输出统计结果"""
+    import scrapy
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    base = f'https://127.0.0.1:{args.port}'
+
+    class BenchSpider(scrapy.Spider):
+        name = 'bench'
+
+        async def start(self):
+            for i in range(args.pages):
+                yield scrapy.Request(f'{base}/app/{i}/', dont_filter=True)
+
+        def parse(self, response):
+            pass
+
+    settings = get_project_settings()
+    settings.setdict({
+        'ROBOTSTXT_OBEY': False,
+        'AUTOTHROTTLE_ENABLED': False,
+        'HTTPCACHE_ENABLED': False,
+        'CONCURRENT_REQUESTS': args.concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': args.concurrency,
+        'LOG_LEVEL': 'WARNING',
+    })
+    settings.setdict(PROFILES[args.crawl])
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(BenchSpider)
+    process.crawl(crawler)
+
+    started = time.monotonic()
+    process.start()
+    elapsed = time.monotonic() - started
+
+    stats = crawler.stats.get_stats()
+    prefix = 'steam_transfer/127.0.0.1/'
+    print(json.dumps({
+        'seconds': round(elapsed, 2),
+        'responses': stats.get('response_received_count', 0),
+        'protocols': {k[len(prefix) + 10:]: v for k, v in stats.items()
+                      if k.startswith(prefix + 'responses/')},
+        'connections_opened': stats.get(prefix + 'connections_opened'),
+        'wire_bytes': stats.get(prefix + 'wire_bytes', 0),
+        'decoded_bytes': stats.get(prefix + 'decoded_bytes', 0),
+    }))
+
+
+def main():
+    args = parse_args()
+
+    if args.serve:
+        return serve(args)
+    if args.crawl:
+        return crawl(args)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SCRAPY_SETTINGS_MODULE='steam.settings',
+               PYTHONPATH=os.pathsep.join([os.path.dirname(here), os.environ.get('PYTHONPATH', '')]))
+
+    with tempfile.TemporaryDirectory() as cert_dir:
+        make_certificate(cert_dir)
+        common = [sys.executable, __file__, '--port', str(args.port), '--cert-dir', cert_dir,
+                  '--pages', str(args.pages), '--concurrency', str(args.concurrency),
+                  '--page-kb', str(args.page_kb), '--rtt-ms', str(args.rtt_ms)]
+
+        server_proc = subprocess.Popen(common + ['--serve'], stdout=subprocess.PIPE, env=env)
+        try:
+            server_proc.stdout.readline()
+            results = {}
+            for profile in PROFILES:
+                out = subprocess.run(common + ['--crawl', profile], env=env, check=True,
+                                     stdout=subprocess.PIPE).stdout
+                results[profile] = json.loads(out.decode().strip().splitlines()[-1])
+
+                stats_out = subprocess.run(
+                    [sys.executable, '-c',
+                     'import ssl, sys, urllib.request; '
+                     'print(urllib.request.urlopen(sys.argv[1], '
+                     'context=ssl._create_unverified_context()).read().decode())',
+                     f'https://127.0.0.1:{args.port}/stats'],
+                    check=True, stdout=subprocess.PIPE).stdout
+                results[profile]['connections'] = json.loads(stats_out)['connections']
+        finally:
+            server_proc.terminate()
+
+    # 客户端统计的新建连接数只有 SteamDownloadHandler 会记录
+    for profile, r in results.items():
+        print("{0:>12}: {1:6.2f}s, {2} responses over {3} TLS connections "
+              "(client counted {4}) {5}, {6} wire bytes -> {7} decoded bytes".format(
+                  profile, r['seconds'], r['responses'], r['connections'],
+                  r['connections_opened'], r['protocols'], r['wire_bytes'], r['decoded_bytes']))
+
+if __name__ == "__main__":
+    main()
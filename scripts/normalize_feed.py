@@ -0,0 +1,174 @@
+"""
+对延迟标准化模式（STEAM_DEFER_NORMALIZATION=True）下抓取到的 .jl 数据做批量标准化。
+抓取时日期和数字字段只保留原始字符串，这里用 pandas 按块向量化地转换：
+    - 日期统一为 'YYYY-MM-DD'，重复的日期字符串只解析一次（跨块缓存）；
+    - 缺失年份的日期（Steam 评论常见）按抓取时间 fetched_at 补全，
+      若补全后晚于抓取时间或在该年不存在（如 Feb 29），则说明是去年的评论，年份减一；
+    - 数字去掉千位分隔符和货币符号后转换为 int/float，无法转换的保留原值。
+
+运行示例:
+    $ python normalize_feed.py \
+        --input $(pwd)/../output/reviews_raw.jl \
+        --output $(pwd)/../output/reviews.jl
+"""
+import argparse
+import json
+import math
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+# 带年份的日期格式，依次尝试
+DATE_FORMATS = ['%b %d, %Y', '%B %d, %Y']
+
+# 需要标准化的字段（产品和评论数据共用，缺失的列会被跳过）
+DATE_COLUMNS = ['release_date', 'date']
+FLOAT_COLUMNS = ['price', 'discount_price', 'hours']
+INT_COLUMNS = ['n_reviews', 'metascore', 'found_helpful', 'found_unhelpful',
+               'found_funny', 'products']
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--input',
+        help='延迟标准化模式下抓取到的 .jl 文件路径。',
+    )
+    parser.add_argument(
+        '--output',
+        help='标准化后的 .jl 文件路径。'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        help='每次读入内存处理的记录数。',
+        type=int,
+        default=100000
+    )
+    return parser.parse_args()
+
+
+def parse_date_keys(keys, cache):
+    """
+    将带年份的日期字符串 Series 解析为 Timestamp，无法解析的为 NaT。
+    重复的字符串只解析一次，结果保存在 cache 中。
+    """
+    new = [k for k in pd.unique(keys.dropna()) if k not in cache]
+    if new:
+        parsed = pd.Series(pd.NaT, index=new, dtype='datetime64[ns]')
+        for fmt in DATE_FORMATS:
+            parsed = parsed.fillna(pd.Series(
+                pd.to_datetime(new, format=fmt, errors='coerce'), index=new))
+        cache.update(parsed.to_dict())
+
+    return pd.to_datetime(keys.map(cache))
+
+
+def normalize_dates(values, fetched, cache):
+    """
+    批量标准化日期列。
+    :param values: 原始日期字符串的 Series
+    :param fetched: 对应记录的抓取时间（UTC Timestamp 的 Series，可能为 NaT）
+    :param cache: 日期字符串 -> Timestamp 的缓存，跨块复用
+    """
+    is_str = values.map(lambda x: isinstance(x, str))
+    if not is_str.any():
+        return values
+
+    raw = values.where(is_str).str.strip()
+    has_year = raw.str.contains(r'\d{4}', na=False)
+
+    # 没有抓取时间时退回当前时间
+    now = pd.Timestamp.now(tz='UTC')
+    fetched = fetched.fillna(now).dt.tz_convert(None)
+
+    # 缺失年份的日期拼上抓取年份，之后与带年份的日期一起解析
+    keys = raw.where(has_year, raw + ', ' + fetched.dt.year.astype(str))
+
+    dates = parse_date_keys(keys.where(is_str), cache)
+
+    # 跨年抓取：补全的日期晚于抓取时间（留一天时区余量）则属于上一年
+    rollback = ~has_year & (dates > fetched.dt.normalize() + pd.Timedelta(days=1))
+    # 在抓取年份中不存在的日期（如非闰年的 Feb 29）也按上一年重新解析
+    rollback |= is_str & ~has_year & dates.isna()
+    if rollback.any():
+        prev_year = (fetched.dt.year - 1).astype(str)
+        dates[rollback] = parse_date_keys((raw + ', ' + prev_year)[rollback], cache)
+
+    # 无法解析的日期保留原样
+    ok = dates.notna()
+    out = values.astype(object).copy()
+    out[ok] = dates[ok].dt.strftime('%Y-%m-%d')
+    return out
+
+
+def normalize_numbers(values, integer=False):
+    """
+    批量将带千位分隔符或货币符号的字符串转换为数字。
+    列表值（如 n_reviews 的多个候选值）取其中的最大值。
+    """
+    exploded = values.explode()
+    cleaned = exploded.astype('string').str.replace(',', '').str.strip(' $')
+    numbers = pd.to_numeric(cleaned, errors='coerce')
+    numbers = numbers.groupby(level=0).max()
+
+    ok = numbers.notna()
+    if integer:
+        numbers = np.trunc(numbers)
+
+    out = values.astype(object).copy()
+    out[ok] = [int(x) if integer else float(x) for x in numbers[ok]]
+    return out
+
+
+def normalize_chunk(df, date_cache):
+    """标准化一块数据中所有已知的日期和数字字段"""
+    if 'fetched_at' in df:
+        fetched = pd.to_datetime(df['fetched_at'], utc=True, errors='coerce')
+    else:
+        fetched = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+
+    for col in DATE_COLUMNS:
+        if col in df:
+            df[col] = normalize_dates(df[col], fetched, date_cache)
+    for col in FLOAT_COLUMNS:
+        if col in df:
+            df[col] = normalize_numbers(df[col])
+    for col in INT_COLUMNS:
+        if col in df:
+            df[col] = normalize_numbers(df[col], integer=True)
+
+    return df
+
+
+def is_missing(x):
+    """判断 DataFrame 补齐时产生的缺失值，以便写回时省略该字段"""
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
+
+def main():
+    args = parse_args()
+
+    date_cache = {}
+    n_rows = 0
+
+    with open(args.input) as fin, open(args.output, 'w') as fout:
+        while True:
+            rows = [json.loads(l) for l in islice(fin, args.chunk_size)]
+            if not rows:
+                break
+
+            df = normalize_chunk(pd.DataFrame(rows, dtype=object), date_cache)
+
+            for row in df.to_dict(orient='records'):
+                row = {k: v for k, v in row.items() if not is_missing(v)}
+                fout.write(json.dumps(row, ensure_ascii=False) + '\n')
+            n_rows += len(rows)
+
+    print("Normalized {0} rows ({1} distinct dates parsed).".format(
+        n_rows, len(date_cache)))
+
+if __name__ == "__main__":
+    main()
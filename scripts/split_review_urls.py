@@ -2,10 +2,14 @@
 将抓取到的游戏产品数据加载到 DataFrame 中，并将评论 URL 分割写入 N 个文本文件。
 这样做是为了将大规模的评论抓取任务拆分为多个小任务，便于并行处理或分布式抓取。
 
+如果提供了已抓取评论的索引（scrapy index_feed 生成），不重复评论数已经抓全的产品会被跳过，
+只为缺失或不完整的产品生成 URL，便于规划补抓。
+
 运行示例:
     $ python split_review_urls.py \
         --scraped-products $(pwd)/../output/products_.jl \
-        --output-dir $(pwd)/../output
+        --output-dir $(pwd)/../output \
+        --review-index $(pwd)/../output/reviews.idx.json
 """
 import argparse
 import json
@@ -32,8 +36,14 @@ def parse_args():
     parser.add_argument(
         '--pieces',
         help='要拆分成多少个文件。',
+        type=int,
         default=10
     )
+    parser.add_argument(
+        '--review-index',
+        help='已抓取评论的索引文件路径（可选），用于跳过评论已抓全的产品。',
+        default=None
+    )
     return parser.parse_args()
 
 
@@ -53,6 +63,17 @@ def main():
     blx_has_reviews = df['n_reviews'] > 0
     blx = blx_nontrivial & blx_has_reviews
 
+    # 根据索引中的每个产品已抓取的不重复评论数，跳过已经抓全的产品
+    # （多次中断的抓取会重复输出同一批评论，原始记录数会高估进度）
+    if args.review_index:
+        with open(args.review_index) as f:
+            scraped = {k: v['distinct_count'] for k, v in json.load(f)['products'].items()}
+        n_scraped = df['id'].astype(str).map(scraped).fillna(0)
+        blx_complete = n_scraped >= df['n_reviews']
+        print("Skipping {0} products whose reviews are already scraped.".format(
+            int((blx & blx_complete).sum())))
+        blx = blx & ~blx_complete
+
     # 提取符合条件的评论 URL 并去重
     urls = df.loc[blx, 'reviews_url'].unique()
     # 随机打乱顺序，避免同一类游戏集中在一起
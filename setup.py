@@ -8,7 +8,7 @@ setup(
     packages = find_packages(),
     entry_points =  {'scrapy': ['settings = steam.settings']},
     install_requires=[
-        'scrapy',
+        'scrapy>=2.14,<3',
         'smart_getenv',
         'botocore'
     ]
@@ -0,0 +1 @@
+# 自定义 Scrapy 命令，通过 settings.py 中的 COMMANDS_MODULE 注册
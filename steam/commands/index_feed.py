@@ -0,0 +1,49 @@
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+
+from ..feed_index import DISTINCT_FIELDS, build_index, default_index_path
+
+
+class Command(ScrapyCommand):
+    """
+    为评论输出文件构建按产品 ID 的字节偏移索引。
+    用法: scrapy index_feed output/reviews_part_01.jl output/reviews_part_02.jl -o output/reviews.idx.json
+    """
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self):
+        return '<file.jl> [<file.jl> ...] [-o index.json]'
+
+    def short_desc(self):
+        return 'Build a product_id -> byte range index for .jl feeds'
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument(
+            '-o', '--output', dest='output', default=None,
+            help='index file path (default: <first file>.idx.json)')
+        parser.add_argument(
+            '--key', dest='key', default='product_id',
+            help='field to index records by (default: product_id)')
+        parser.add_argument(
+            '--date-field', dest='date_field', default='date',
+            help='field used for per-product date ranges (default: date)')
+        parser.add_argument(
+            '--distinct-fields', dest='distinct_fields', default=','.join(DISTINCT_FIELDS),
+            help='comma-separated fields identifying duplicate records, first non-null wins '
+                 '(default: %(default)s)')
+
+    def run(self, args, opts):
+        if not args:
+            raise UsageError()
+
+        index_path = opts.output or default_index_path(args[0])
+        index = build_index(args, index_path, key=opts.key, date_field=opts.date_field,
+                            distinct_fields=opts.distinct_fields.split(','))
+
+        n_records = sum(entry['count'] for entry in index['products'].values())
+        n_distinct = sum(entry['distinct_count'] for entry in index['products'].values())
+        print(f"Indexed {n_records} records ({n_distinct} distinct) of "
+              f"{len(index['products'])} products into {index_path}")
@@ -0,0 +1,64 @@
+import logging
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+
+logger = logging.getLogger(__name__)
+
+
+class HostTransferStats:
+    """
+    按主机统计传输情况的扩展，统计项以 'steam_transfer/<host>/' 为前缀：
+    - wire_bytes: 实际从网络收到的响应体字节数（压缩后）
+    - decoded_bytes: 经 HttpCompressionMiddleware 解压后的响应体字节数
+    - responses/<protocol>: 各协议（HTTP/1.1、h2）的响应数
+    - connections_opened / connection_requests: 由 SteamDownloadHandler 的连接池记录
+    爬虫结束时计算连接复用率和压缩比，并输出到日志。
+    命中 HTTP 缓存的响应不计入统计。
+    """
+    def __init__(self, stats):
+        self.stats = stats
+        self.hosts = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('HOST_TRANSFER_STATS_ENABLED'):
+            raise NotConfigured
+
+        ext = cls(crawler.stats)
+        crawler.signals.connect(ext.bytes_received, signal=signals.bytes_received)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def inc(self, request, name, count=1):
+        host = urlparse_cached(request).hostname
+        self.hosts.add(host)
+        self.stats.inc_value(f'steam_transfer/{host}/{name}', count)
+
+    def bytes_received(self, data, request, spider):
+        self.inc(request, 'wire_bytes', len(data))
+
+    def response_received(self, response, request, spider):
+        if 'cached' in response.flags:
+            return
+        self.inc(request, 'decoded_bytes', len(response.body))
+        self.inc(request, f'responses/{response.protocol or "unknown"}')
+
+    def spider_closed(self, spider):
+        for host in sorted(self.hosts):
+            prefix = f'steam_transfer/{host}/'
+            requests = self.stats.get_value(prefix + 'connection_requests', 0)
+            opened = self.stats.get_value(prefix + 'connections_opened', 0)
+            wire = self.stats.get_value(prefix + 'wire_bytes', 0)
+            decoded = self.stats.get_value(prefix + 'decoded_bytes', 0)
+
+            if requests:
+                self.stats.set_value(prefix + 'connection_reuse_rate',
+                                     round(1 - opened / requests, 4))
+            if wire:
+                self.stats.set_value(prefix + 'compression_ratio', round(decoded / wire, 2))
+
+            logger.info(f'{host}: {opened} connections for {requests} requests, '
+                        f'{wire} wire bytes -> {decoded} decoded bytes')
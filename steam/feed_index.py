@@ -0,0 +1,197 @@
+import json
+import logging
+import mmap
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# Steam 每个用户对每个产品只能写一篇评论，用评论者标识给重复抓取的记录去重；
+# 没有 user_id 的评论（自定义主页地址的用户）退而使用 username
+DISTINCT_FIELDS = ('user_id', 'username')
+
+# 只有标准化后的 'YYYY-MM-DD' 日期才能按字符串比较出先后
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def default_index_path(path):
+    """单个输出文件对应的默认索引文件路径"""
+    return path + '.idx.json'
+
+
+def record_identity(record, line, distinct_fields):
+    """记录的去重标识：distinct_fields 中第一个有值的字段，都没有时使用整行内容"""
+    for field in distinct_fields:
+        value = record.get(field)
+        if value is not None:
+            return field, str(value)
+    return None, line.strip()
+
+
+def scan_part(path, key='product_id', date_field='date', distinct_fields=DISTINCT_FIELDS):
+    """
+    逐行扫描一个 .jl 文件，按 key 聚合出每个产品记录的字节区间。
+    并发抓取时不同产品的记录大致每页（约 10 条）就会交错一次，区间可能很多、很短；
+    只有相邻的记录会被合并成一个区间。
+    count 为原始记录数，identities 为去重标识的集合（同一产品被重复抓取时不会重复计数）。
+    :return: {key: {'count', 'identities', 'min_date', 'max_date', 'ranges': [[start, end], ...]}}
+    """
+    products = {}
+    offset = 0
+
+    with open(path, 'rb') as f:
+        for line in f:
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f'Skipping malformed line at {path}:{start}')
+                continue
+
+            product_id = record.get(key)
+            if product_id is None:
+                continue
+
+            entry = products.setdefault(str(product_id), {
+                'count': 0, 'identities': set(), 'min_date': None, 'max_date': None, 'ranges': []
+            })
+            entry['count'] += 1
+            entry['identities'].add(record_identity(record, line, distinct_fields))
+
+            ranges = entry['ranges']
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = offset
+            else:
+                ranges.append([start, offset])
+
+            date = record.get(date_field)
+            if isinstance(date, str) and ISO_DATE.match(date):
+                if entry['min_date'] is None or date < entry['min_date']:
+                    entry['min_date'] = date
+                if entry['max_date'] is None or date > entry['max_date']:
+                    entry['max_date'] = date
+
+    return products
+
+
+def build_index(paths, index_path, key='product_id', date_field='date',
+                distinct_fields=DISTINCT_FIELDS):
+    """
+    为一个或多个 .jl 输出文件（如多个 part）构建索引并写入 index_path。
+    索引记录每个产品在各文件中的字节区间、原始记录数（count）、
+    跨文件去重后的记录数（distinct_count）和日期范围，
+    文件路径保存为相对索引文件所在目录的路径。
+    """
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    parts = []
+    products = {}
+
+    for n_part, path in enumerate(paths):
+        parts.append({
+            'path': os.path.relpath(os.path.abspath(path), index_dir),
+            'size': os.path.getsize(path),
+        })
+
+        for product_id, entry in scan_part(path, key, date_field, distinct_fields).items():
+            merged = products.setdefault(product_id, {
+                'count': 0, 'identities': set(), 'min_date': None, 'max_date': None, 'ranges': []
+            })
+            merged['count'] += entry['count']
+            merged['identities'] |= entry['identities']
+            merged['ranges'].extend([n_part, start, end] for start, end in entry['ranges'])
+            for field, pick in [('min_date', min), ('max_date', max)]:
+                dates = [d for d in (merged[field], entry[field]) if d is not None]
+                merged[field] = pick(dates) if dates else None
+
+    for entry in products.values():
+        entry['distinct_count'] = len(entry.pop('identities'))
+
+    index = {
+        'version': INDEX_VERSION,
+        'key': key,
+        'parts': parts,
+        'products': products,
+    }
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+
+    return index
+
+
+class FeedIndex:
+    """
+    基于索引随机访问 .jl 输出文件的读取器。
+    按需以内存映射方式打开各个文件，只解析目标产品所在的字节区间。
+
+    用法:
+        with FeedIndex('output/reviews.jl.idx.json') as index:
+            for review in index.read('414700'):
+                ...
+    """
+    def __init__(self, index_path):
+        with open(index_path) as f:
+            self.index = json.load(f)
+
+        if self.index.get('version') != INDEX_VERSION:
+            raise ValueError(f'Unsupported index version in {index_path}')
+
+        index_dir = os.path.dirname(os.path.abspath(index_path))
+        self.paths = [os.path.join(index_dir, part['path']) for part in self.index['parts']]
+        self._maps = {}
+
+    @property
+    def products(self):
+        """产品 ID -> 记录数、日期范围和字节区间"""
+        return self.index['products']
+
+    def stats(self, product_id):
+        """返回某个产品的原始记录数、去重后的记录数和日期范围，未收录时返回 None"""
+        entry = self.products.get(str(product_id))
+        if entry is None:
+            return None
+        return {k: entry[k] for k in ('count', 'distinct_count', 'min_date', 'max_date')}
+
+    def _map(self, n_part):
+        if n_part not in self._maps:
+            path = self.paths[n_part]
+            size = self.index['parts'][n_part]['size']
+            if os.path.getsize(path) != size:
+                raise ValueError(f'Index is stale: {path} changed since it was indexed')
+
+            with open(path, 'rb') as f:
+                self._maps[n_part] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[n_part]
+
+    def read(self, product_id):
+        """按输出顺序逐条返回某个产品的全部记录"""
+        entry = self.products.get(str(product_id))
+        if entry is None:
+            return
+
+        for n_part, start, end in entry['ranges']:
+            m = self._map(n_part)
+            pos = start
+            # 在内存映射中逐行定位，每次只复制一条记录
+            while pos < end:
+                newline = m.find(b'\n', pos, end)
+                line_end = end if newline == -1 else newline
+                line = m[pos:line_end]
+                pos = line_end + 1
+                if line.strip():
+                    yield json.loads(line)
+
+    def close(self):
+        for m in self._maps.values():
+            m.close()
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,108 @@
+import logging
+from weakref import WeakSet
+
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.utils.httpobj import urlparse_cached
+
+try:
+    from scrapy.core.downloader.handlers.http2 import H2DownloadHandler
+except ImportError:  # 未安装 h2 时只使用 HTTP/1.1
+    H2DownloadHandler = None
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionCounter:
+    """
+    包装连接池的取用连接方法，按主机记录取用次数和新建连接数。
+    连接池返回的连接对象第一次出现时记为新建，之后再出现记为复用。
+    连接池的 key 为 (scheme, host, port, ...) 元组。
+    Twisted 的连接池会把复用的连接包装在 _RetryingHTTP11ClientProtocol 中，
+    计数前先取出被包装的连接。
+    """
+    def __init__(self, get_connection, stats):
+        self.get_connection = get_connection
+        self.stats = stats
+        self.seen = WeakSet()
+
+    def __call__(self, key, *args):
+        host = key[1].decode() if isinstance(key[1], bytes) else str(key[1])
+        self.stats.inc_value(f'steam_transfer/{host}/connection_requests')
+
+        def count(conn):
+            protocol = getattr(conn, '_clientProtocol', conn)
+            if protocol not in self.seen:
+                self.seen.add(protocol)
+                self.stats.inc_value(f'steam_transfer/{host}/connections_opened')
+            return conn
+
+        return self.get_connection(key, *args).addCallback(count)
+
+
+def instrument_pool(handler, method_name, stats):
+    """
+    为下载处理器的连接池加上 ConnectionCounter。
+    这是本项目唯一依赖 Scrapy 内部实现的地方：HTTP11DownloadHandler 和 H2DownloadHandler
+    都把连接池保存在 _pool 上（setup.py 中固定了对应的 Scrapy 版本范围）。
+    连接池本身不做替换，只包装它取用连接的方法
+    （Twisted HTTPConnectionPool.getConnection / Scrapy H2ConnectionPool.get_connection）。
+    """
+    pool = handler._pool
+    setattr(pool, method_name, ConnectionCounter(getattr(pool, method_name), stats))
+
+
+class InstrumentedHTTP11DownloadHandler(HTTP11DownloadHandler):
+    """记录每个主机连接复用情况的 HTTP/1.1 下载处理器"""
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        instrument_pool(self, 'getConnection', crawler.stats)
+
+
+if H2DownloadHandler is not None:
+    class InstrumentedH2DownloadHandler(H2DownloadHandler):
+        """记录每个主机连接复用情况的 HTTP/2 下载处理器，同一主机的请求在一条连接上多路复用"""
+        def __init__(self, crawler):
+            super().__init__(crawler)
+            instrument_pool(self, 'get_connection', crawler.stats)
+
+
+class SteamDownloadHandler:
+    """
+    Steam 爬虫使用的 http/https 下载处理器。
+    - STEAM_HTTP2_HOSTS 中的主机走 HTTP/2（需要安装 h2 并设置 STEAM_HTTP2_ENABLED），
+      所有请求复用同一条 TLS 连接；
+    - 其余请求（包括明文 http 和使用代理的请求）走 Scrapy 的 HTTP/1.1 持久连接池；
+    - 两种连接池都会按主机记录新建连接数和取用次数（见 HostTransferStats）。
+    """
+    lazy = False
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.http2_hosts = set(settings.getlist('STEAM_HTTP2_HOSTS'))
+        self.http11 = InstrumentedHTTP11DownloadHandler(crawler)
+
+        self.http2 = None
+        if settings.getbool('STEAM_HTTP2_ENABLED'):
+            if H2DownloadHandler is None:
+                logger.info('h2 is not installed, using HTTP/1.1 for all hosts.')
+            else:
+                self.http2 = InstrumentedH2DownloadHandler(crawler)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def use_http2(self, request):
+        if self.http2 is None or request.meta.get('proxy'):
+            return False
+        parsed = urlparse_cached(request)
+        return parsed.scheme == 'https' and parsed.hostname in self.http2_hosts
+
+    async def download_request(self, request):
+        handler = self.http2 if self.use_http2(request) else self.http11
+        return await handler.download_request(request)
+
+    async def close(self):
+        await self.http11.close()
+        if self.http2 is not None:
+            await self.http2.close()
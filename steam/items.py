@@ -1,7 +1,9 @@
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+from email.utils import parsedate_to_datetime
 import logging
 
 import scrapy
+from itemadapter import ItemAdapter
 from scrapy.loader import ItemLoader
 from itemloaders.processors import Compose, Join, MapCompose, TakeFirst
 
@@ -85,6 +87,26 @@ def str_to_int(x):
         return x
 
 
+def get_fetch_timestamp(response):
+    """
+    获取页面的抓取时间（ISO 8601 格式，UTC）
+    优先使用响应头中的 Date（命中 HTTP 缓存时仍是原始抓取时间），否则使用当前时间
+    延迟标准化阶段依靠它来补全缺失的年份
+    """
+    fetched = None
+    header = response.headers.get('Date')
+    if header:
+        try:
+            fetched = parsedate_to_datetime(header.decode('latin-1'))
+        except (TypeError, ValueError):
+            logger.debug(f'Could not parse Date header {header!r}')
+
+    if fetched is None:
+        fetched = datetime.now(timezone.utc)
+
+    return fetched.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
 class ProductItem(scrapy.Item):
     """
     定义游戏产品的数据结构
@@ -101,7 +123,8 @@ class ProductItem(scrapy.Item):
     developer = scrapy.Field() # 开发商
     publisher = scrapy.Field() # 发行商
     release_date = scrapy.Field( # 发行日期
-        output_processor=Compose(TakeFirst(), StripText(), standardize_date)
+        output_processor=Compose(TakeFirst(), StripText(), standardize_date),
+        raw_output_processor=Compose(TakeFirst(), StripText())
     )
     specs = scrapy.Field( # 游戏特性（如单人、多人、支持手柄等）
         output_processor=MapCompose(StripText())
@@ -112,24 +135,29 @@ class ProductItem(scrapy.Item):
     price = scrapy.Field( # 当前价格
         output_processor=Compose(TakeFirst(),
                                  StripText(chars=' $\n\t\r'),
-                                 str_to_float)
+                                 str_to_float),
+        raw_output_processor=Compose(TakeFirst(), StripText(chars=' $\n\t\r'))
     )
     discount_price = scrapy.Field( # 折后价格
         output_processor=Compose(TakeFirst(),
                                  StripText(chars=' $\n\t\r'),
-                                 str_to_float)
+                                 str_to_float),
+        raw_output_processor=Compose(TakeFirst(), StripText(chars=' $\n\t\r'))
     )
     sentiment = scrapy.Field() # 总体评价概览（如 'Very Positive'）
     n_reviews = scrapy.Field( # 总评论数
         output_processor=Compose(
             MapCompose(StripText(), lambda x: x.replace(',', ''), str_to_int),
             max
-        )
+        ),
+        raw_output_processor=MapCompose(StripText())  # 保留全部候选值，由标准化阶段取最大值
     )
     metascore = scrapy.Field( # Metacritic 评分
-        output_processor=Compose(TakeFirst(), StripText(), str_to_int)
+        output_processor=Compose(TakeFirst(), StripText(), str_to_int),
+        raw_output_processor=Compose(TakeFirst(), StripText())
     )
     early_access = scrapy.Field() # 是否为抢先体验游戏
+    fetched_at = scrapy.Field()   # 抓取时间（仅在延迟标准化模式下输出）
 
 
 class ReviewItem(scrapy.Item):
@@ -143,34 +171,56 @@ class ReviewItem(scrapy.Item):
         output_processor=Compose(TakeFirst(), simplify_recommended),
     )
     date = scrapy.Field( # 评论发布日期
-        output_processor=Compose(TakeFirst(), standardize_date)
+        output_processor=Compose(TakeFirst(), standardize_date),
+        raw_output_processor=TakeFirst()
     )
     text = scrapy.Field( # 评论正文内容
         input_processor=MapCompose(StripText()),
         output_processor=Compose(Join('\n'), StripText())
     )
     hours = scrapy.Field( # 游玩时长（小时）
-        output_processor=Compose(TakeFirst(), str_to_float)
+        output_processor=Compose(TakeFirst(), str_to_float),
+        raw_output_processor=TakeFirst()
     )
     found_helpful = scrapy.Field( # 认为有帮助的人数
-        output_processor=Compose(TakeFirst(), str_to_int)
+        output_processor=Compose(TakeFirst(), str_to_int),
+        raw_output_processor=TakeFirst()
     )
     found_unhelpful = scrapy.Field( # 认为没帮助的人数
-        output_processor=Compose(TakeFirst(), str_to_int)
+        output_processor=Compose(TakeFirst(), str_to_int),
+        raw_output_processor=TakeFirst()
     )
     found_funny = scrapy.Field( # 认为有趣的次数
-        output_processor=Compose(TakeFirst(), str_to_int)
+        output_processor=Compose(TakeFirst(), str_to_int),
+        raw_output_processor=TakeFirst()
     )
     compensation = scrapy.Field() # 是否收到补偿（如免费获取）
     username = scrapy.Field()     # 评论者用户名
     user_id = scrapy.Field()      # 评论者 ID
     products = scrapy.Field(      # 评论者拥有的游戏数量
-        output_processor=Compose(TakeFirst(), str_to_int)
+        output_processor=Compose(TakeFirst(), str_to_int),
+        raw_output_processor=TakeFirst()
     )
     early_access = scrapy.Field() # 是否为抢先体验阶段的评论
+    fetched_at = scrapy.Field()   # 抓取时间（仅在延迟标准化模式下输出）
+
+
+class DeferredNormalizationLoader(ItemLoader):
+    """
+    支持延迟标准化的加载器基类
+    通过上下文参数 defer_normalization=True 启用：日期和数字字段改用
+    raw_output_processor，输出原始字符串，留给抓取结束后的批量标准化阶段处理
+    （见 scripts/normalize_feed.py）
+    """
+    def get_output_processor(self, field_name):
+        if self.context.get('defer_normalization'):
+            proc = ItemAdapter(self.item).get_field_meta(field_name).get('raw_output_processor')
+            if proc:
+                return proc
+        return super().get_output_processor(field_name)
 
 
-class ProductItemLoader(ItemLoader):
+class ProductItemLoader(DeferredNormalizationLoader):
     """
     产品数据的加载器
     默认取第一个非空值并去除空白
@@ -178,7 +228,7 @@ class ProductItemLoader(ItemLoader):
     default_output_processor = Compose(TakeFirst(), StripText())
 
 
-class ReviewItemLoader(ItemLoader):
+class ReviewItemLoader(DeferredNormalizationLoader):
     """
     评论数据的加载器
     默认取第一个非空值
@@ -1,11 +1,15 @@
 import logging
 import os
 import re
+import zlib
+from cssselect import GenericTranslator
+from lxml import etree
 from w3lib.url import url_query_cleaner
 
-from scrapy import Request
+from scrapy import Request, signals
 from scrapy.downloadermiddlewares.redirect import RedirectMiddleware
 from scrapy.dupefilters import RFPDupeFilter
+from scrapy.exceptions import NotConfigured, StopDownload
 from scrapy.extensions.httpcache import FilesystemCacheStorage
 from scrapy.utils.request import fingerprint
 
@@ -60,3 +64,172 @@ class CircumventAgeCheckMiddleware(RedirectMiddleware):
                        cookies={'mature_content': '1'},
                        meta={'dont_cache': True},
                        callback=request.callback)
+
+
+class _ProductStream:
+    """
+    单个产品页面的流式解析状态。
+    body_length 为响应头中的 Content-Length，未知时为 None 或 UNKNOWN_LENGTH。
+    将（必要时先解压的）响应体分块喂给 lxml 增量解析器，记录已经完整出现的锚点，
+    以及结束标记（之后不会再出现 load_product 读取的区域）是否已经完整出现。
+    """
+    def __init__(self, anchors, optional, stop_marker, content_encoding, body_length):
+        self.anchors = anchors
+        self.unseen = set(anchors)
+        self.required = set(anchors) - set(optional)
+        self.stop_marker = stop_marker
+        self.marker_seen = stop_marker is None
+        self.parser = etree.HTMLPullParser(events=('end',))
+        self.wire_bytes = 0
+        self.html_bytes = 0
+        # 分块传输时 body_length 是 Twisted 的 UNKNOWN_LENGTH（字符串）
+        self.expected_bytes = None
+        if isinstance(body_length, int) and body_length > 0:
+            self.expected_bytes = body_length
+
+        if content_encoding == b'gzip':
+            self.decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        elif content_encoding == b'deflate':
+            self.decompressor = zlib.decompressobj()
+        else:
+            self.decompressor = None
+
+    def feed(self, data):
+        self.wire_bytes += len(data)
+        if self.decompressor:
+            data = self.decompressor.decompress(data)
+        self.html_bytes += len(data)
+
+        self.parser.feed(data)
+        for _, element in self.parser.read_events():
+            # 锚点都是带 class 或 id 的容器，跳过其余元素以减少匹配开销
+            if not (element.get('class') or element.get('id')):
+                continue
+            for name in list(self.unseen):
+                if self.anchors[name](element):
+                    self.unseen.discard(name)
+                    self.required.discard(name)
+            if not self.marker_seen and self.stop_marker(element):
+                self.marker_seen = True
+
+    @property
+    def done(self):
+        """必需锚点都已出现，且已越过结束标记（可选区域如果存在也已出现）"""
+        return not self.required and self.marker_seen
+
+
+class StreamingProductMiddleware:
+    """
+    商店产品页面的流式下载中间件。
+    产品页面大部分是脚本、媒体轮播和推荐内容，而 load_product 只读取其中几个区域。
+    下载过程中将数据块喂给增量解析器，当 PRODUCT_STREAM_ANCHORS 中的必需锚点
+    （PRODUCT_STREAM_OPTIONAL_ANCHORS 以外的锚点）都已完整出现、并且结束标记
+    PRODUCT_STREAM_STOP_MARKER 也已完整出现时，或解码后的字节数达到
+    PRODUCT_STREAM_MAX_BYTES 时，提前终止下载，之后 load_product 会在截断后的页面上照常提取数据。
+    可选锚点（如 metascore、抢先体验标记）只在部分页面上出现，结束标记保证它们如果存在就已被下载。
+
+    被截断的响应带有 'download_stopped' 标记，并在 meta['product_stream'] 中记录
+    收到的字节数、节省的字节数（仅在有 Content-Length 时可知）、是否因字节上限终止和未出现的锚点。
+    截断的页面不会写入 HTTP 缓存。
+    """
+    product_url = re.compile(r'//store\.steampowered\.com/app/\d+')
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('PRODUCT_STREAM_ENABLED'):
+            raise NotConfigured
+
+        translator = GenericTranslator()
+        self.anchors = {
+            name: etree.XPath(translator.css_to_xpath(css, prefix='self::'))
+            for name, css in settings.getdict('PRODUCT_STREAM_ANCHORS').items()
+        }
+        self.optional = settings.getlist('PRODUCT_STREAM_OPTIONAL_ANCHORS')
+        stop_marker = settings.get('PRODUCT_STREAM_STOP_MARKER')
+        self.stop_marker = None
+        if stop_marker:
+            self.stop_marker = etree.XPath(translator.css_to_xpath(stop_marker, prefix='self::'))
+        self.max_bytes = settings.getint('PRODUCT_STREAM_MAX_BYTES')
+        self.stats = crawler.stats
+        self.streams = {}
+
+        crawler.signals.connect(self.headers_received, signal=signals.headers_received)
+        crawler.signals.connect(self.bytes_received, signal=signals.bytes_received)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_request(self, request, spider=None):
+        if self.product_url.search(request.url):
+            # 增量解压只支持 gzip 和 deflate
+            request.headers['Accept-Encoding'] = 'gzip, deflate'
+            request.meta['product_stream_enabled'] = True
+
+    def headers_received(self, headers, body_length, request, spider):
+        # 重定向时 meta 会被复制，每个新响应都重新开始统计
+        request.meta.pop('product_stream', None)
+        self.streams.pop(request, None)
+
+        if not request.meta.get('product_stream_enabled'):
+            return
+
+        encoding = headers.get('Content-Encoding', b'identity').lower()
+        if encoding not in (b'identity', b'gzip', b'deflate'):
+            logger.debug(f'Not streaming {request.url}: unsupported encoding {encoding!r}')
+            return
+
+        self.streams[request] = _ProductStream(
+            self.anchors, self.optional, self.stop_marker, encoding, body_length)
+
+    def bytes_received(self, data, request, spider):
+        stream = self.streams.get(request)
+        if stream is None:
+            return
+
+        try:
+            stream.feed(data)
+        except (zlib.error, etree.LxmlError) as e:
+            logger.debug(f'Stopped streaming {request.url}: {e}')
+            del self.streams[request]
+            return
+
+        at_cap = bool(self.max_bytes) and stream.html_bytes >= self.max_bytes
+        if not stream.done and not at_cap:
+            return
+
+        del self.streams[request]
+        if stream.expected_bytes and stream.wire_bytes >= stream.expected_bytes:
+            return  # 已经收到完整响应，无需终止
+
+        bytes_saved = None
+        if stream.expected_bytes:
+            bytes_saved = stream.expected_bytes - stream.wire_bytes
+
+        request.meta['dont_cache'] = True
+        request.meta['product_stream'] = {
+            'truncated': True,
+            'bytes_received': stream.wire_bytes,
+            'bytes_saved': bytes_saved,
+            'stopped_at_cap': not stream.done,
+            'unseen_anchors': sorted(stream.unseen),
+        }
+
+        self.stats.inc_value('product_stream/truncated')
+        self.stats.inc_value('product_stream/bytes_received', stream.wire_bytes)
+        if bytes_saved is not None:
+            self.stats.inc_value('product_stream/bytes_saved', bytes_saved)
+        if not stream.done:
+            self.stats.inc_value('product_stream/stopped_at_cap')
+            for name in stream.unseen:
+                self.stats.inc_value(f'product_stream/unseen_anchor/{name}')
+            logger.debug(f'Byte cap reached for {request.url}, anchors not seen: {sorted(stream.unseen)}')
+
+        raise StopDownload(fail=False)
+
+    def process_response(self, request, response, spider=None):
+        self.streams.pop(request, None)
+        return response
+
+    def process_exception(self, request, exception, spider=None):
+        self.streams.pop(request, None)
@@ -7,6 +7,9 @@ BOT_NAME = 'steam'
 SPIDER_MODULES = ['steam.spiders']
 NEWSPIDER_MODULE = 'steam.spiders'
 
+# 自定义命令模块（scrapy index_feed）
+COMMANDS_MODULE = 'steam.commands'
+
 # 默认 User-Agent，可以设置为浏览器的 UA 以防被封
 USER_AGENT = 'Steam Scraper'
 
@@ -18,8 +21,63 @@ DOWNLOADER_MIDDLEWARES = {
     # 禁用默认的重定向中间件，改用自定义的绕过年龄验证中间件
     'scrapy.downloadermiddlewares.redirect.RedirectMiddleware': None,
     'steam.middlewares.CircumventAgeCheckMiddleware': 600,
+    'steam.middlewares.StreamingProductMiddleware': 650,
 }
 
+# 产品页面流式下载：必需锚点和结束标记都完整出现，或达到字节上限后提前终止下载
+PRODUCT_STREAM_ENABLED = getenv('PRODUCT_STREAM_ENABLED', type=bool, default=False)
+# 解码后 HTML 的字节上限
+PRODUCT_STREAM_MAX_BYTES = 256 * 1024
+# load_product 读取的所有页面区域，键为锚点名称，值为匹配单个容器元素的 CSS 选择器
+PRODUCT_STREAM_ANCHORS = {
+    'app_name': '.apphub_AppName',
+    'tags': '.glance_tags',
+    'reviews': '.user_reviews',
+    'early_access': '.early_access_header',
+    'purchase': '.game_area_purchase_game',
+    'metascore': '#game_area_metascore',
+    'specs': '#category_block',
+    'details': '.details_block',
+}
+# load_product 提取的各字段所在的区域，用于在截断的页面上判断哪些字段可能被截掉
+PRODUCT_STREAM_FIELD_ANCHORS = {
+    'app_name': 'app_name',
+    'title': 'details',
+    'genres': 'details',
+    'developer': 'details',
+    'publisher': 'details',
+    'release_date': 'details',
+    'specs': 'specs',
+    'tags': 'tags',
+    'price': 'purchase',
+    'discount_price': 'purchase',
+    'sentiment': 'reviews',
+    'n_reviews': 'reviews',
+    'metascore': 'metascore',
+    'early_access': 'early_access',
+}
+# 只在部分页面上出现的区域，不要求出现
+PRODUCT_STREAM_OPTIONAL_ANCHORS = ['early_access', 'metascore']
+# 结束标记：商店页面中位于上述所有区域之后的“关于这款游戏”区块，
+# 它完整出现后可选区域如果不存在就不会再出现
+PRODUCT_STREAM_STOP_MARKER = '#game_area_description'
+
+# 下载处理器：在 Scrapy 默认的 HTTP/1.1 处理器上按主机记录连接的新建和复用次数，
+# 连接池和压缩沿用 Scrapy 默认配置；可选让 Steam 主机走 HTTP/2
+DOWNLOAD_HANDLERS = {
+    'http': 'steam.handlers.SteamDownloadHandler',
+    'https': 'steam.handlers.SteamDownloadHandler',
+}
+# 是否启用 HTTP/2 取决于实际网络延迟，可用 scripts/bench_download.py --rtt-ms 对比，默认关闭
+STEAM_HTTP2_ENABLED = getenv('STEAM_HTTP2_ENABLED', type=bool, default=False)
+STEAM_HTTP2_HOSTS = ['store.steampowered.com', 'steamcommunity.com']
+
+# 按主机统计连接复用和传输字节数
+EXTENSIONS = {
+    'steam.extensions.HostTransferStats': 500,
+}
+HOST_TRANSFER_STATS_ENABLED = True
+
 # 启用自动限速 (AutoThrottle)
 # 自动根据 Steam 的服务器响应调整抓取速度
 AUTOTHROTTLE_ENABLED = True
@@ -39,5 +97,9 @@ HTTPCACHE_STORAGE = 'steam.middlewares.SteamCacheStorage'
 AWS_ACCESS_KEY_ID = getenv('AWS_ACCESS_KEY_ID', type=str, default=None)
 AWS_SECRET_ACCESS_KEY = getenv('AWS_SECRET_ACCESS_KEY', type=str, default=None)
 
+# 延迟标准化：抓取时日期和数字字段只输出原始字符串，并附带抓取时间 fetched_at，
+# 抓取结束后再用 scripts/normalize_feed.py 批量转换，减轻抓取过程中的 CPU 开销
+STEAM_DEFER_NORMALIZATION = getenv('STEAM_DEFER_NORMALIZATION', type=bool, default=False)
+
 # 导出数据编码格式
 FEED_EXPORT_ENCODING = 'utf-8'
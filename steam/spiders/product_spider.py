@@ -2,21 +2,23 @@ import logging
 import re
 from w3lib.url import canonicalize_url, url_query_cleaner
 
-from scrapy.http import FormRequest
+from scrapy.http import FormRequest, Request
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
 
-from ..items import ProductItem, ProductItemLoader
+from ..items import ProductItem, ProductItemLoader, get_fetch_timestamp
 
 logger = logging.getLogger(__name__)
 
 
-def load_product(response):
+def load_product(response, defer_normalization=False):
     """
     从产品页面响应中加载 ProductItem。
     这个函数负责提取页面上的各种信息并填充到 Item 对象中。
+    :param defer_normalization: 为 True 时日期和数字保留原始字符串，并记录抓取时间
     """
-    loader = ProductItemLoader(item=ProductItem(), response=response)
+    loader = ProductItemLoader(item=ProductItem(), response=response,
+                               defer_normalization=defer_normalization)
 
     # 清理 URL，移除 snr 参数并规范化
     url = url_query_cleaner(response.url, ['snr'], remove=True)
@@ -87,6 +89,9 @@ def load_product(response):
     else:
         loader.add_value('early_access', False)
 
+    if defer_normalization:
+        loader.add_value('fetched_at', get_fetch_timestamp(response))
+
     return loader.load_item()
 
 
@@ -169,4 +174,29 @@ class ProductSpider(CrawlSpider):
 
         else:
             # 正常页面，提取数据
-            yield load_product(response)
+            product = load_product(
+                response,
+                defer_normalization=self.settings.getbool('STEAM_DEFER_NORMALIZATION'))
+            self.report_truncation(response, product)
+            yield product
+
+    def report_truncation(self, response, product):
+        """
+        如果页面因达到字节上限被流式下载截断（见 StreamingProductMiddleware），
+        统计因截断而缺失的字段，便于判断锚点和字节上限是否合适。
+        正常终止时所有锚点和结束标记都已完整出现，不会有字段被截掉；
+        达到字节上限时只统计所在区域（PRODUCT_STREAM_FIELD_ANCHORS）未出现的字段。
+        """
+        stream = response.meta.get('product_stream')
+        if not stream or not stream.get('stopped_at_cap'):
+            return
+
+        unseen = set(stream['unseen_anchors'])
+        field_anchors = self.settings.getdict('PRODUCT_STREAM_FIELD_ANCHORS')
+        # early_access 总有值，区域未出现时 False 也可能只是抢先体验标记被截掉了
+        missing = [field for field, anchor in field_anchors.items()
+                   if anchor in unseen and not product.get(field)]
+        for field in missing:
+            self.crawler.stats.inc_value(f'product_stream/missing_field/{field}')
+        if missing:
+            logger.debug(f'Fields missing from truncated page {response.url}: {missing}')
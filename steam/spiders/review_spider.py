@@ -4,18 +4,20 @@ import scrapy
 from scrapy.http import FormRequest, Request
 from w3lib.url import url_query_parameter
 
-from ..items import ReviewItem, ReviewItemLoader, str_to_int
+from ..items import ReviewItem, ReviewItemLoader, get_fetch_timestamp, str_to_int
 
 
-def load_review(review, product_id, page, order):
+def load_review(review, product_id, page, order, fetched_at=None):
     """
     从单个评论元素中加载 ReviewItem。
     :param review: 评论的 HTML 元素选择器
     :param product_id: 游戏 ID
     :param page: 当前页码
     :param order: 当前页内的排序
+    :param fetched_at: 页面抓取时间；提供时启用延迟标准化，日期和数字保留原始字符串
     """
-    loader = ReviewItemLoader(ReviewItem(), review)
+    loader = ReviewItemLoader(ReviewItem(), review,
+                              defer_normalization=fetched_at is not None)
 
     loader.add_value('product_id', product_id)
     loader.add_value('page', page)
@@ -46,6 +48,9 @@ def load_review(review, product_id, page, order):
     else:
         loader.add_value('early_access', False)
 
+    if fetched_at is not None:
+        loader.add_value('fetched_at', fetched_at)
+
     return loader.load_item()
 
 
@@ -138,10 +143,15 @@ class ReviewSpider(scrapy.Spider):
         page = get_page(response)
         product_id = get_product_id(response)
 
+        # 延迟标准化模式下记录抓取时间，用于补全评论日期中缺失的年份
+        fetched_at = None
+        if self.settings.getbool('STEAM_DEFER_NORMALIZATION'):
+            fetched_at = get_fetch_timestamp(response)
+
         # 加载当前页面的所有评论
         reviews = response.css('div .apphub_Card')
         for i, review in enumerate(reviews):
-            yield load_review(review, product_id, page, i)
+            yield load_review(review, product_id, page, i, fetched_at)
 
         # 导航到下一页
         # Steam 评论分页使用表单提交而不是简单的链接
@@ -0,0 +1,59 @@
+import json
+
+from steam.feed_index import FeedIndex, build_index
+
+
+def write_part(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_read_returns_only_requested_product(tmp_path):
+    write_part(tmp_path / 'p1.jl', [
+        {'product_id': '1', 'date': '2020-01-02', 'text': 'héllo'},
+        {'product_id': '1', 'date': '2020-01-01'},
+        {'product_id': '2', 'date': '2021-05-05'},
+        {'product_id': '1', 'date': 'Dec 3'},
+    ])
+    write_part(tmp_path / 'p2.jl', [{'product_id': '2', 'date': '2019-01-01'}])
+    index_path = str(tmp_path / 'reviews.idx.json')
+
+    build_index([str(tmp_path / 'p1.jl'), str(tmp_path / 'p2.jl')], index_path)
+
+    with FeedIndex(index_path) as index:
+        assert [r['date'] for r in index.read('1')] == ['2020-01-02', '2020-01-01', 'Dec 3']
+        assert [r['date'] for r in index.read(2)] == ['2021-05-05', '2019-01-01']
+        assert list(index.read('3')) == []
+        assert index.stats('1') == {'count': 3, 'distinct_count': 3,
+                                    'min_date': '2020-01-01', 'max_date': '2020-01-02'}
+        assert index.stats('2') == {'count': 2, 'distinct_count': 2,
+                                    'min_date': '2019-01-01', 'max_date': '2021-05-05'}
+
+
+def test_distinct_count_across_parts(tmp_path):
+    # 两次中断的抓取都拿到了同一批评论，去重后的数量不应翻倍
+    first_run = [{'product_id': '1', 'user_id': str(n)} for n in range(3)]
+    second_run = first_run + [{'product_id': '1', 'username': 'vanity'},
+                              {'product_id': '1', 'username': 'vanity'}]
+    write_part(tmp_path / 'p1.jl', first_run)
+    write_part(tmp_path / 'p2.jl', second_run)
+    index_path = str(tmp_path / 'reviews.idx.json')
+
+    build_index([str(tmp_path / 'p1.jl'), str(tmp_path / 'p2.jl')], index_path)
+
+    with FeedIndex(index_path) as index:
+        assert index.stats('1')['count'] == 8
+        assert index.stats('1')['distinct_count'] == 4
+        assert len(list(index.read('1'))) == 8
+
+
+def test_last_record_without_trailing_newline(tmp_path):
+    path = tmp_path / 'p.jl'
+    path.write_text('{"product_id": "1"}\n{"product_id": "1", "text": "x"}')
+    index_path = str(tmp_path / 'p.idx.json')
+
+    build_index([str(path)], index_path)
+
+    with FeedIndex(index_path) as index:
+        assert list(index.read('1')) == [{'product_id': '1'}, {'product_id': '1', 'text': 'x'}]
@@ -0,0 +1,62 @@
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from steam.extensions import HostTransferStats
+from steam.handlers import ConnectionCounter
+
+
+class Connection:
+    pass
+
+
+class RetryingConnection:
+    """模拟 Twisted 连接池对复用连接的包装"""
+    def __init__(self, connection):
+        self._clientProtocol = connection
+
+
+def test_connection_counter_counts_new_and_reused_connections():
+    stats = get_crawler().stats
+    first, second = Connection(), Connection()
+    connections = iter([first, RetryingConnection(first), second, RetryingConnection(first)])
+    counter = ConnectionCounter(lambda key, endpoint: defer.succeed(next(connections)), stats)
+
+    key = ('https', b'store.steampowered.com', 443)
+    for _ in range(4):
+        counter(key, None)
+
+    assert stats.get_value('steam_transfer/store.steampowered.com/connection_requests') == 4
+    assert stats.get_value('steam_transfer/store.steampowered.com/connections_opened') == 2
+
+
+def test_host_transfer_stats():
+    crawler = get_crawler(settings_dict={'HOST_TRANSFER_STATS_ENABLED': True})
+    stats = crawler.stats
+    ext = HostTransferStats.from_crawler(crawler)
+    prefix = 'steam_transfer/store.steampowered.com/'
+
+    # 连接池记录的 4 次取用中只新建了 1 条连接
+    stats.set_value(prefix + 'connection_requests', 4)
+    stats.set_value(prefix + 'connections_opened', 1)
+
+    for n, protocol in enumerate(['HTTP/1.1', 'HTTP/1.1', 'h2']):
+        request = Request(f'https://store.steampowered.com/app/{n}/')
+        ext.bytes_received(data=b'x' * 100, request=request, spider=None)
+        response = Response(request.url, body=b'y' * 400, protocol=protocol, request=request)
+        ext.response_received(response=response, request=request, spider=None)
+
+    # 命中 HTTP 缓存的响应不计入统计
+    request = Request('https://store.steampowered.com/app/3/')
+    cached = Response(request.url, body=b'y' * 400, flags=['cached'], request=request)
+    ext.response_received(response=cached, request=request, spider=None)
+
+    ext.spider_closed(spider=None)
+
+    assert stats.get_value(prefix + 'wire_bytes') == 300
+    assert stats.get_value(prefix + 'decoded_bytes') == 1200
+    assert stats.get_value(prefix + 'responses/HTTP/1.1') == 2
+    assert stats.get_value(prefix + 'responses/h2') == 1
+    assert stats.get_value(prefix + 'connection_reuse_rate') == 0.75
+    assert stats.get_value(prefix + 'compression_ratio') == 4.0
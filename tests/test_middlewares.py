@@ -0,0 +1,106 @@
+import gzip
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import StopDownload
+from scrapy.http import Headers
+from scrapy.utils.test import get_crawler
+from twisted.web.iweb import UNKNOWN_LENGTH
+
+from steam import settings as steam_settings
+from steam.middlewares import StreamingProductMiddleware
+
+PAGE = (
+    b'<html><body>'
+    b'<div class="apphub_AppName">Cold Fear</div>'
+    b'<div class="glance_tags"><a class="app_tag">Horror</a></div>'
+    b'<div class="user_reviews"><span class="game_review_summary">Very Positive</span></div>'
+    b'<div class="game_area_purchase_game"><div class="game_purchase_price">$9.99</div></div>'
+    b'<div id="game_area_metascore"><div class="score">66</div></div>'
+    b'<div id="category_block"><div class="game_area_details_specs"><a>Single-player</a></div></div>'
+    b'<div class="details_block">Developer: Darkworks<br></div>'
+    b'<div id="game_area_description">About this game</div>'
+) + b''.join(b'<script>var x%d = 1;</script>' % i for i in range(20000)) + b'</body></html>'
+
+URL = 'https://store.steampowered.com/app/15270/Cold_Fear/'
+
+
+def make_middleware(**settings):
+    crawler = get_crawler(settings_dict={
+        'PRODUCT_STREAM_ENABLED': True,
+        'PRODUCT_STREAM_MAX_BYTES': steam_settings.PRODUCT_STREAM_MAX_BYTES,
+        'PRODUCT_STREAM_ANCHORS': steam_settings.PRODUCT_STREAM_ANCHORS,
+        'PRODUCT_STREAM_OPTIONAL_ANCHORS': steam_settings.PRODUCT_STREAM_OPTIONAL_ANCHORS,
+        'PRODUCT_STREAM_STOP_MARKER': steam_settings.PRODUCT_STREAM_STOP_MARKER,
+        **settings,
+    })
+    return StreamingProductMiddleware(crawler)
+
+
+def stream(mw, body, body_length, encoding=None, chunk_size=4096):
+    """模拟下载处理器依次发送 headers_received 和 bytes_received 信号"""
+    request = Request(URL)
+    mw.process_request(request, None)
+
+    headers = Headers({'Content-Encoding': encoding} if encoding else {})
+    mw.headers_received(headers=headers, body_length=body_length, request=request, spider=None)
+
+    for i in range(0, len(body), chunk_size):
+        try:
+            mw.bytes_received(data=body[i:i + chunk_size], request=request, spider=None)
+        except StopDownload as e:
+            assert not e.fail
+            return request, i + chunk_size
+    return request, None
+
+
+@pytest.mark.parametrize('encoding', [None, b'gzip'])
+def test_stops_with_content_length(encoding):
+    body = gzip.compress(PAGE) if encoding else PAGE
+    mw = make_middleware()
+
+    request, stopped_at = stream(mw, body, len(body), encoding)
+
+    assert stopped_at is not None and stopped_at < len(body)
+    info = request.meta['product_stream']
+    assert info['truncated'] and not info['stopped_at_cap']
+    assert info['bytes_saved'] == len(body) - info['bytes_received']
+    assert info['unseen_anchors'] == ['early_access']
+    assert request.meta['dont_cache']
+
+
+@pytest.mark.parametrize('encoding', [None, b'gzip'])
+def test_stops_with_chunked_transfer(encoding):
+    body = gzip.compress(PAGE) if encoding else PAGE
+    mw = make_middleware()
+
+    request, stopped_at = stream(mw, body, UNKNOWN_LENGTH, encoding)
+
+    assert stopped_at is not None and stopped_at < len(body)
+    info = request.meta['product_stream']
+    assert info['truncated'] and not info['stopped_at_cap']
+    assert info['bytes_saved'] is None
+
+
+def test_waits_for_stop_marker_and_stops_at_cap():
+    # 没有结束标记时只能在字节上限处终止，并报告未出现的可选锚点
+    page = PAGE.replace(b'game_area_description', b'something_else')
+    mw = make_middleware(PRODUCT_STREAM_MAX_BYTES=64 * 1024)
+
+    request, stopped_at = stream(mw, page, UNKNOWN_LENGTH)
+
+    info = request.meta['product_stream']
+    assert info['stopped_at_cap']
+    assert info['bytes_received'] >= 64 * 1024
+    assert info['unseen_anchors'] == ['early_access']
+
+
+def test_ignores_non_product_urls():
+    mw = make_middleware()
+    request = Request('https://steamcommunity.com/app/15270/reviews/')
+    mw.process_request(request, None)
+    mw.headers_received(headers=Headers(), body_length=UNKNOWN_LENGTH, request=request, spider=None)
+
+    mw.bytes_received(data=PAGE, request=request, spider=None)
+
+    assert 'product_stream' not in request.meta
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from normalize_feed import normalize_chunk, normalize_dates  # noqa: E402
+
+
+def fetched_series(*timestamps):
+    return pd.to_datetime(pd.Series(timestamps), utc=True)
+
+
+def test_yearless_date_rolls_back_across_new_year():
+    values = pd.Series(['December 30', 'Jan 1', 'Dec 3, 2019'], dtype=object)
+    fetched = fetched_series('2025-01-02T10:00:00Z', '2025-01-02T10:00:00Z', '2025-01-02T10:00:00Z')
+
+    out = normalize_dates(values, fetched, {})
+
+    assert list(out) == ['2024-12-30', '2025-01-01', '2019-12-03']
+
+
+def test_feb_29_resolves_to_leap_year():
+    values = pd.Series(['Feb 29', 'February 29'], dtype=object)
+    fetched = fetched_series('2024-03-05T00:00:00Z', '2025-01-02T00:00:00Z')
+
+    out = normalize_dates(values, fetched, {})
+
+    assert list(out) == ['2024-02-29', '2024-02-29']
+
+
+def test_repeated_dates_are_parsed_once_and_unparseable_kept():
+    cache = {}
+    values = pd.Series(['December 30'] * 3 + ['not a date'], dtype=object)
+    fetched = fetched_series(*['2025-01-02T10:00:00Z'] * 4)
+
+    out = normalize_dates(values, fetched, cache)
+
+    assert list(out) == ['2024-12-30'] * 3 + ['not a date']
+    assert sum(pd.notna(v) for v in cache.values()) == 2  # 'December 30, 2025' 和 'December 30, 2024'
+
+
+def test_normalize_chunk_converts_numbers():
+    df = pd.DataFrame([{
+        'date': 'December 30', 'hours': '1,234.5', 'found_helpful': '1,005',
+        'n_reviews': ['1,234', '99'], 'price': 'Free', 'fetched_at': '2025-01-02T10:00:00Z',
+    }], dtype=object)
+
+    row = normalize_chunk(df, {}).iloc[0]
+
+    assert row['date'] == '2024-12-30'
+    assert row['hours'] == 1234.5
+    assert row['found_helpful'] == 1005
+    assert row['n_reviews'] == 1234
+    assert row['price'] == 'Free'
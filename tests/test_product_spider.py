@@ -0,0 +1,46 @@
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from steam import settings as steam_settings
+from steam.spiders.product_spider import ProductSpider, load_product
+from tests.test_middlewares import PAGE, URL, make_middleware, stream
+
+# 发行详情放在大段脚本之后，字节上限会先于它到达
+LATE_DETAILS_PAGE = PAGE.replace(b'<div class="details_block">Developer: Darkworks<br></div>', b'').replace(
+    b'</body>', b'<div class="details_block">Developer: Darkworks<br></div></body>')
+
+
+def make_spider():
+    crawler = get_crawler(ProductSpider, settings_dict={
+        'PRODUCT_STREAM_FIELD_ANCHORS': steam_settings.PRODUCT_STREAM_FIELD_ANCHORS,
+    })
+    return ProductSpider.from_crawler(crawler)
+
+
+def report(page, **settings):
+    """流式下载页面，在截断后的响应上提取产品并统计缺失字段"""
+    mw = make_middleware(**settings)
+    request, stopped_at = stream(mw, page, len(page))
+    response = HtmlResponse(URL, body=page[:stopped_at], request=request)
+
+    spider = make_spider()
+    product = load_product(response)
+    spider.report_truncation(response, product)
+    return product, {k.rsplit('/', 1)[1]: v for k, v in spider.crawler.stats.get_stats().items()
+                     if k.startswith('product_stream/missing_field/')}
+
+
+def test_normal_stop_reports_nothing():
+    # 页面本来就没有的字段（如 discount_price、title）不算被截掉
+    product, missing = report(PAGE)
+    assert 'discount_price' not in product
+    assert missing == {}
+
+
+def test_cap_reports_only_cut_off_regions():
+    product, missing = report(LATE_DETAILS_PAGE, PRODUCT_STREAM_MAX_BYTES=64 * 1024)
+
+    assert product['app_name'] == 'Cold Fear'
+    assert 'developer' not in product
+    assert set(missing) == {'title', 'genres', 'developer', 'publisher', 'release_date',
+                            'early_access'}